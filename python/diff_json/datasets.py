@@ -0,0 +1,195 @@
+import hashlib
+import heapq
+import json
+import logging
+import os
+import tempfile
+from .diffing import JSONDiff
+from .exceptions import InvalidNDJSONRecord
+from .utility import decode_json
+
+
+logger = logging.getLogger("diff_json")
+
+
+class NDJSONDiff:
+    """
+    Finds the differences between two collections of JSON objects stored as NDJSON (one object per line), pairing
+    records by a key field. Neither collection is held in memory: each is split into sorted runs on disk, and the runs
+    are merge-joined on the key. Only record pairs whose fingerprints differ are passed to JSONDiff
+
+    :param old_ndjson: the old (left side) collection, as a file path, or an iterable of lines such as an open file
+    :param new_ndjson: the new (right side) collection, as a file path, or an iterable of lines such as an open file
+    :param key_field: (optional, default `"id"`) the top-level field that identifies a record in both collections
+    :param run_length: (optional, default `100000`) the maximum number of records held in memory and sorted at once,
+        which bounds memory use during the sort
+    :param temp_dir: (optional, default `None`) the directory in which the sorted runs are written. If not provided,
+        the system default temporary directory is used
+    :param merge_fan_in: (optional, default `64`) the maximum number of run files open at once while merging. When
+        there are more runs than this, they are merged in several passes
+    :param diff_options: any other keyword arguments are passed to JSONDiff for each changed record pair. A
+        `json_decoder` option is also used to decode each line
+    """
+
+    def __init__(self, old_ndjson, new_ndjson, key_field="id", run_length=100000, temp_dir=None, merge_fan_in=64,
+                 **diff_options):
+        self.old_ndjson = old_ndjson
+        self.new_ndjson = new_ndjson
+        self.key_field = key_field
+        self.run_length = run_length
+        self.temp_dir = temp_dir
+        self.merge_fan_in = max(2, merge_fan_in)
+        self.diff_options = diff_options
+        self.decoder = diff_options.get("json_decoder") or decode_json
+
+    def run(self):
+        """
+        Generates one operation per added, removed, or changed record, in key order:
+        `{'op': 'add', 'key': key, 'value': record}`, `{'op': 'remove', 'key': key}`, or
+        `{'op': 'change', 'key': key, 'patch': patch}`. Records that are identical, or whose only differences are
+        ignored by the diff options, produce no operation
+        """
+        with tempfile.TemporaryDirectory(prefix="diff_json_", dir=self.temp_dir) as run_dir:
+            old_runs = self.__write_sorted_runs(self.old_ndjson, os.path.join(run_dir, "old"))
+            new_runs = self.__write_sorted_runs(self.new_ndjson, os.path.join(run_dir, "new"))
+            old_records = self.__merge_runs(old_runs)
+            new_records = self.__merge_runs(new_runs)
+            old_record = next(old_records, None)
+            new_record = next(new_records, None)
+
+            while old_record is not None or new_record is not None:
+                if new_record is None or (old_record is not None and old_record[0] < new_record[0]):
+                    yield {'op': 'remove', 'key': json.loads(old_record[0])}
+                    old_record = next(old_records, None)
+                elif old_record is None or new_record[0] < old_record[0]:
+                    yield {'op': 'add', 'key': json.loads(new_record[0]), 'value': self.__decode(new_record[2])[0]}
+                    new_record = next(new_records, None)
+                else:
+                    if old_record[1] != new_record[1]:
+                        json_diff = JSONDiff(old_record[2], new_record[2], **self.diff_options)
+                        json_diff.run()
+                        patch = json_diff.get_patch()
+
+                        if patch:
+                            yield {'op': 'change', 'key': json.loads(old_record[0]), 'patch': patch}
+
+                    old_record = next(old_records, None)
+                    new_record = next(new_records, None)
+
+    def __write_sorted_runs(self, ndjson, run_prefix):
+        run_paths = []
+        records = []
+
+        for record in self.__read_records(ndjson):
+            records.append(record)
+
+            if len(records) >= self.run_length:
+                run_paths.append(self.__write_run(records, f"{run_prefix}_{len(run_paths)}"))
+                records = []
+
+        if records or not run_paths:
+            run_paths.append(self.__write_run(records, f"{run_prefix}_{len(run_paths)}"))
+
+        logger.debug(f"NDJSON Sorted Runs Written: {len(run_paths)}")
+        merge_pass = 0
+
+        # Runs are merged in groups until a single pass can merge the rest, so that no more than `merge_fan_in` run
+        # files are ever open at once
+        while len(run_paths) > self.merge_fan_in:
+            merge_pass = merge_pass + 1
+            merged_paths = []
+
+            for i in range(0, len(run_paths), self.merge_fan_in):
+                merged_path = f"{run_prefix}_pass{merge_pass}_{len(merged_paths)}"
+                self.__merge_run_files(run_paths[i:i + self.merge_fan_in], merged_path)
+                merged_paths.append(merged_path)
+
+            run_paths = merged_paths
+
+        return run_paths
+
+    @staticmethod
+    def __merge_run_files(run_paths, merged_path):
+        run_files = [open(run_path, mode="r", encoding="utf-8", newline="\n") for run_path in run_paths]
+
+        try:
+            with open(merged_path, mode="w", encoding="utf-8", newline="\n") as merged_file:
+                merged_file.writelines(heapq.merge(*run_files))
+        finally:
+            for run_file in run_files:
+                run_file.close()
+
+        for run_path in run_paths:
+            os.remove(run_path)
+
+    @staticmethod
+    def __write_run(records, run_path):
+        records.sort()
+
+        with open(run_path, mode="w", encoding="utf-8", newline="\n") as run_file:
+            for encoded_key, fingerprint, line in records:
+                run_file.write(f"{encoded_key}\t{fingerprint}\t{line}\n")
+
+        return run_path
+
+    def __read_records(self, ndjson):
+        if isinstance(ndjson, (str, os.PathLike)):
+            with open(ndjson, mode="r", encoding="utf-8") as ndjson_file:
+                yield from self.__read_records(ndjson_file)
+            return
+
+        for line_number, line in enumerate(ndjson, start=1):
+            if isinstance(line, (bytes, bytearray)):
+                line = line.decode("utf-8")
+
+            line = line.strip()
+
+            if line == "":
+                continue
+
+            try:
+                record, encoded_record = self.__decode(line)
+            except ValueError:
+                raise InvalidNDJSONRecord(f"Line {line_number} could not be decoded")
+
+            if not isinstance(record, dict) or self.key_field not in record:
+                raise InvalidNDJSONRecord(f"Line {line_number} is not an object with a '{self.key_field}' field")
+
+            # Keys are compared by their JSON encoding, which gives every key type a consistent order, and cannot
+            # contain the tab or newline characters used to delimit the runs on disk
+            encoded_key = json.dumps(record[self.key_field])
+            fingerprint = hashlib.blake2b(encoded_record.encode("utf-8"), digest_size=16).hexdigest()
+
+            yield encoded_key, fingerprint, line
+
+    def __decode(self, line):
+        """Returns a decoded line, along with its canonical encoding"""
+        record = self.decoder(line)
+        encoded_record = json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+        # Integers that orjson decoded as floats are encoded with an exponent, so the line only needs to be decoded
+        # again when one appears in the canonical encoding (see `is_lossy_float`)
+        if self.decoder is decode_json and "e+" in encoded_record:
+            record = decode_json(line, exact=True)
+            encoded_record = json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+        return record, encoded_record
+
+    @staticmethod
+    def __merge_runs(run_paths):
+        run_files = [open(run_path, mode="r", encoding="utf-8", newline="\n") for run_path in run_paths]
+
+        try:
+            previous_key = None
+
+            for run_line in heapq.merge(*run_files):
+                record = run_line.rstrip("\n").split("\t", 2)
+
+                if record[0] == previous_key:
+                    raise InvalidNDJSONRecord(f"The key {record[0]} appears on more than one line")
+
+                previous_key = record[0]
+                yield record
+        finally:
+            for run_file in run_files:
+                run_file.close()
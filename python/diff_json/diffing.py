@@ -1,6 +1,8 @@
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from .mapping import JSONMap
-from .pathfinding import XPathMatch
+from .pathfinding import XPath, XPathMatch
+from .similarity import find_similar_pairs, minhash_sketch
 
 
 logger = logging.getLogger("diff_json")
@@ -10,12 +12,15 @@ class JSONDiff:
     """
     Contains two JSON documents, their maps, and the differences between them
 
-    :param old_json: JSON document as a string or Python structure, the old (left side) doc
-    :param new_json: JSON document as a string or Python structure, the new (right side) doc
+    :param old_json: JSON document as an encoded string/bytes-like object or Python structure, the old (left side) doc
+    :param new_json: JSON document as an encoded string/bytes-like object or Python structure, the new (right side) doc
     :param ignore_paths: (optional, default `None`) a sequence or set of XPath strings with optional wildcards, which
-        will be skipped during the diff process. Each element is converted to an XPathMatch object.
-        Example value: `["/components/**"]`, which indicates that all descendants of `json['components']` will not have
-        a difference calculated
+        will be skipped during the diff process. Each element is converted to an XPathMatch object, and matching
+        elements are left out of both JSONMaps, so that changes within them do not make their ancestors unequal. A
+        matching element always takes all of its descendants with it, even when the pattern has no wildcard, so
+        `"/components"` and `"/components/*"` also leave out everything below them. Example value:
+        `["/components/**"]`, which indicates that all descendants of `json['components']` will not have a difference
+        calculated
     :param count_paths: (optional, default `None`) a dict of form {XPath wildcard string -> set(operations)}. If not
         provided, the default behavior is defined as {"/**": ("add", "remove", "replace", "move", "update")}, meaning
         that all paths in the document will have add, remove, replace, move, and update operations counted.
@@ -30,18 +35,38 @@ class JSONDiff:
         patch document generated by `get_patch()`
     :param replace_primitives_arrays: (optional, default `False`) indicates whether to skip finding the diff of arrays
         that contain only primitive values, instead registering only a "replace" operation for the entire array
+    :param json_decoder: (optional, default `None`) a callable used to decode JSON documents passed as strings or
+        bytes-like objects. See the JSONMap `decoder` parameter
+    :param match_modified_array_elements: (optional, default `False`) if `track_array_moves` is enabled, also pairs
+        array elements that moved and were modified, by comparing similarity sketches of their contents. A paired
+        element is registered as a move, followed by the nested diff between its old and new values, rather than by
+        the diff against whatever value now occupies its old position
+    :param array_similarity_threshold: (optional, default `0.5`) the estimated fraction of shared leaf paths/values
+        required for `match_modified_array_elements` to pair two elements. Only elements whose sketches share a band
+        are compared, and the band size is chosen from this threshold so that a pair exactly at the threshold is found
+        at least 95% of the time, with more similar pairs found more reliably. Lower thresholds use smaller bands,
+        which compares more candidate pairs
+    :param parallel_depth: (optional, default `None`) if provided, every shared array or object at this depth (1 being
+        the direct children of the root) whose old and new values are not equal is diffed in a separate process, and
+        its operations are merged into `diff` at the point its path is reached in `ordered`. Unequal subtrees are rare
+        for small documents, so this is only worthwhile when those subtrees are large
+    :param max_workers: (optional, default `None`) the number of processes used when `parallel_depth` is provided. If
+        not provided, the number of processors on the machine is used
     """
 
     def __init__(self, old_json, new_json, ignore_paths=None, count_paths=None, track_array_moves=True,
-                 max_array_tracking_length=None, track_structure_updates=False, replace_primitives_arrays=False):
-        self.old_map = JSONMap(old_json)
-        self.new_map = JSONMap(new_json)
+                 max_array_tracking_length=None, track_structure_updates=False, replace_primitives_arrays=False,
+                 json_decoder=None, match_modified_array_elements=False, array_similarity_threshold=0.5,
+                 parallel_depth=None, max_workers=None):
         self.ignore_paths = set()
         self.count_paths = {}
 
         if ignore_paths:
             self.ignore_paths = set(map(XPathMatch.from_path_string, ignore_paths))
 
+        self.old_map = JSONMap(old_json, ignore_paths=self.ignore_paths, decoder=json_decoder)
+        self.new_map = JSONMap(new_json, ignore_paths=self.ignore_paths, decoder=json_decoder)
+
         if count_paths:
             for match_string in count_paths:
                 self.count_paths[XPathMatch.from_path_string(match_string)] = count_paths[match_string]
@@ -53,18 +78,21 @@ class JSONDiff:
         self.max_array_tracking_length = max_array_tracking_length
         self.track_structure_updates = track_structure_updates
         self.replace_primitives_arrays = replace_primitives_arrays
+        self.match_modified_array_elements = match_modified_array_elements
+        self.array_similarity_threshold = array_similarity_threshold
+        self.parallel_depth = parallel_depth
+        self.max_workers = max_workers
         self.moves = {}
         self.diff = {}
+        self.__processing = None
+        self.__operation_groups = None
 
     def run(self):
-        for xpath in self.ordered:
-            if xpath not in self.ignored:
-                if xpath in self.shared:
-                    self.__diff_element(xpath)
-                elif xpath in self.added:
-                    self.__handle_added_element(xpath)
-                else:
-                    self.__handle_removed_element(xpath)
+        if self.parallel_depth:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                self.__run_paths(self.__dispatch_subtree_diffs(executor))
+        else:
+            self.__run_paths({})
 
     def get_patch(self):
         patch = []
@@ -76,6 +104,52 @@ class JSONDiff:
 
         return patch
 
+    def _run_grouped(self):
+        """Runs the diff, returning the operations grouped by the relative path being processed when they were found"""
+        self.__operation_groups = {}
+        self.run()
+
+        return self.__operation_groups
+
+    def __run_paths(self, subtree_diffs):
+        subtree_operations = {}
+
+        for xpath in self.ordered:
+            if xpath not in self.ignored:
+                self.__processing = xpath
+                subtree = tuple(xpath.segments[0:self.parallel_depth]) if subtree_diffs else None
+
+                # Operations from a dispatched subtree are registered as each of its paths is reached, which keeps the
+                # order of `diff` identical to that of a serial run
+                if subtree in subtree_diffs:
+                    if subtree not in subtree_operations:
+                        subtree_operations[subtree] = subtree_diffs[subtree].result()
+
+                    nested_path = tuple(xpath.segments[self.parallel_depth:])
+                    self.__register_nested_operations(XPath(list(subtree)),
+                                                      subtree_operations[subtree].get(nested_path, []))
+                elif xpath in self.shared:
+                    self.__diff_element(xpath)
+                elif xpath in self.added:
+                    self.__handle_added_element(xpath)
+                else:
+                    self.__handle_removed_element(xpath)
+
+    def __dispatch_subtree_diffs(self, executor):
+        subtree_diffs = {}
+
+        for xpath in self.ordered:
+            if len(xpath) == self.parallel_depth and xpath in self.shared and xpath not in self.ignored:
+                elements = self._get_shared_path_elements(xpath)
+
+                if self._get_diff_type(elements) in ("diff/array", "diff/object"):
+                    subtree_diffs[tuple(xpath.segments)] = executor.submit(_run_nested_diff, elements['old'].value,
+                                                           elements['new'].value, self.__get_nested_diff_options(xpath))
+
+        logger.debug(f"Subtree Diffs Dispatched: {len(subtree_diffs)}")
+
+        return subtree_diffs
+
     def __gather_paths(self):
         omxs = set(self.old_map.xpaths())
         nmxs = set(self.new_map.xpaths())
@@ -86,11 +160,9 @@ class JSONDiff:
         dropped = omxs - shared
         ignored = set()
 
-        for xpath in ordered:
-            for ipath in self.ignore_paths:
-                if ipath.matches_path(xpath):
-                    ignored.add(xpath)
-                    break
+        # Ignored paths are never mapped, so the root (e.g. under "/**") is the only path that can still match one
+        if any(ipath.matches_path(XPath([])) for ipath in self.ignore_paths):
+            ignored.add(XPath([]))
 
         return [ordered, shared, added, dropped, ignored]
 
@@ -121,6 +193,10 @@ class JSONDiff:
         else:
             self.diff[xpath] = [operation]
 
+        if self.__operation_groups is not None:
+            processing_segments = tuple(self.__processing.segments)
+            self.__operation_groups.setdefault(processing_segments, []).append((xpath.segments, operation))
+
     def __replace_array(self, old_array, new_array):
         return self.replace_primitives_arrays \
                and old_array.array_type == "primitives" \
@@ -140,7 +216,7 @@ class JSONDiff:
         new_elements = set(self.new_map.get_elements(index_paths))
         shared_elements = (old_elements & new_elements)
         old_move_check = sorted(old_elements - shared_elements)
-        new_move_check = new_elements - shared_elements
+        new_move_check = sorted(new_elements - shared_elements)
         max_possible_moves = min(len(old_move_check), len(new_move_check))
 
         if max_possible_moves > 0:
@@ -152,6 +228,80 @@ class JSONDiff:
             for move in found_movements:
                 self.__register_operation(move['old'].xpath, "send")
                 self.__register_operation(move['new'].xpath, "move", from_path=move['old'].xpath)
+
+            if self.match_modified_array_elements:
+                moved_hashes = {move['old'].value_hash for move in found_movements}
+                self.__find_array_modified_moves(
+                    [oe for oe in old_move_check if oe.value_hash not in moved_hashes],
+                    [ne for ne in new_move_check if ne.value_hash not in moved_hashes]
+                )
+
+    def __find_array_modified_moves(self, old_elements, new_elements):
+        old_sketches = self.__get_element_sketches(old_elements)
+        new_sketches = self.__get_element_sketches(new_elements)
+        similar_pairs = find_similar_pairs(old_sketches, new_sketches, self.array_similarity_threshold)
+
+        for _, old_xpath, new_xpath in similar_pairs:
+            # An element that was only modified in place is already handled by diffing its position
+            if old_xpath == new_xpath:
+                continue
+
+            self.__register_operation(old_xpath, "send")
+            self.__register_operation(new_xpath, "move", from_path=old_xpath)
+            self.__register_nested_diff(new_xpath, self.old_map[old_xpath], self.new_map[new_xpath])
+            self.__add_element_sub_path_ignores(new_xpath)
+
+    @staticmethod
+    def __get_element_sketches(elements):
+        sketches = {}
+
+        for element in elements:
+            if element.json_type != "primitive":
+                sketches[element.xpath] = minhash_sketch(element.value)
+
+        return sketches
+
+    def __register_nested_diff(self, xpath, old_element, new_element):
+        if old_element.json_type != new_element.json_type:
+            self.__register_operation(xpath, "replace", value=new_element.value)
+            return
+
+        operation_groups = _run_nested_diff(old_element.value, new_element.value, self.__get_nested_diff_options(xpath))
+
+        for nested_operations in operation_groups.values():
+            self.__register_nested_operations(xpath, nested_operations)
+
+    def __register_nested_operations(self, xpath, nested_operations):
+        for nested_segments, operation in nested_operations:
+            from_path = None
+
+            if 'from' in operation:
+                from_path = XPath(xpath.segments + XPath.path_string_to_segments(operation['from']))
+
+            self.__register_operation(XPath(xpath.segments + nested_segments), operation['op'],
+                                      value=operation.get('value'), from_path=from_path)
+
+    def __get_nested_diff_options(self, xpath):
+        return {
+            'ignore_paths': self.__get_nested_ignore_paths(xpath),
+            'track_array_moves': self.track_array_moves,
+            'max_array_tracking_length': self.max_array_tracking_length,
+            'track_structure_updates': self.track_structure_updates,
+            'replace_primitives_arrays': self.replace_primitives_arrays,
+            'match_modified_array_elements': self.match_modified_array_elements,
+            'array_similarity_threshold': self.array_similarity_threshold
+        }
+
+    def __get_nested_ignore_paths(self, xpath):
+        nested_ignore_paths = []
+
+        for ipath in self.ignore_paths:
+            if len(ipath) >= len(xpath) and ipath.segments[0:len(xpath)] == xpath.segments:
+                nested_path = XPathMatch(ipath.segments[len(xpath):], ipath.wildcard)
+                wildcard = f"/{nested_path.wildcard}" if nested_path.wildcard else ""
+                nested_ignore_paths.append(nested_path.path + wildcard)
+
+        return nested_ignore_paths
     
     def __diff_element(self, xpath):
         elements = self._get_shared_path_elements(xpath)
@@ -205,3 +355,10 @@ class JSONDiff:
             return f"diff/{elements['old'].json_type}"
 
         return "replace"
+
+
+def _run_nested_diff(old_value, new_value, diff_options):
+    """Diffs two values as separate documents, returning {processed path segments -> [(path segments, operation)]}"""
+    nested_diff = JSONDiff(old_value, new_value, **diff_options)
+
+    return nested_diff._run_grouped()
@@ -4,3 +4,7 @@ class JSONStructureError(Exception):
 
 class InvalidJSONDocument(Exception):
     pass
+
+
+class InvalidNDJSONRecord(Exception):
+    pass
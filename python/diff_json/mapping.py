@@ -1,6 +1,6 @@
 import json
 import logging
-from .utility import is_json_structure, py_to_json_type
+from .utility import decode_json, is_encoded_json, is_json_structure, is_lossy_float, py_to_json_type
 from .exceptions import InvalidJSONDocument, JSONStructureError
 from .pathfinding import XPath
 
@@ -12,7 +12,7 @@ class JSONElement:
     __slots__ = ["id", "xpath", "json_type", "value", "value_hash", "length", "array_type", "object_keys", "index",
                  "key", "indentation", "trailing_comma"]
 
-    def __init__(self, xpath, value, array_index=None, object_key=None, trailing_comma=False):
+    def __init__(self, xpath, value, array_index=None, object_key=None, trailing_comma=False, hashed_value=None):
         self.xpath = xpath
         self.value = value
         self.json_type = py_to_json_type(self.value)
@@ -21,7 +21,9 @@ class JSONElement:
             raise TypeError(f"The value provided is not of a non-JSON compatible type: {type(self.value)}."
                             "Allowed types are: list, tuple, dict, str, int, float, bool, and None.")
 
-        self.value_hash = self.__hash_value()
+        # When parts of the value are ignored, the hash is calculated from a pruned copy of the value, so that changes
+        # within the ignored parts do not make this element unequal
+        self.value_hash = self.__hash_value(self.value if hashed_value is None else hashed_value)
         self.id = f"{self.xpath.id}|{self.value_hash:016x}"
         self.length = 0 if self.json_type == "primitive" else len(self.value)
         self.array_type = self.__get_array_type(self.json_type, self.value)
@@ -44,11 +46,11 @@ class JSONElement:
     def __lt__(self, other):
         return self.id < other.id
 
-    def __hash_value(self):
+    def __hash_value(self, value):
         if self.json_type == "primitive":
-            return hash(self.value)
+            return hash(value)
         else:
-            return hash(json.dumps(self.value))
+            return hash(json.dumps(value))
 
     @staticmethod
     def __get_array_type(json_type, value):
@@ -73,20 +75,45 @@ class JSONElement:
 
 
 class JSONMap:
-    def __init__(self, json_document):
-        if isinstance(json_document, str):
+    """
+    A listing of all XPaths within a JSON document, pointing to their respective JSONElement
+
+    :param json_document: JSON document as an encoded `str`, `bytes`, `bytearray` or `memoryview`, or as a Python
+        structure
+    :param ignore_paths: (optional, default `None`) a sequence or set of XPathMatch objects. Matching elements, and all
+        of their descendants, are left out of the map entirely, and are excluded from the hashes of their ancestors
+    :param decoder: (optional, default `None`) a callable that decodes an encoded JSON document into a Python
+        structure, raising a `ValueError` if it cannot. If not provided, orjson is used when it is installed, with the
+        standard library json module as the fallback
+    """
+
+    def __init__(self, json_document, ignore_paths=None, decoder=None):
+        encoded_document = json_document
+        # Only documents decoded here by the default decoder are checked for integers that were decoded as floats
+        self.__check_lossy_floats = decoder is None and is_encoded_json(json_document)
+        self.__lossy_float_found = False
+
+        if is_encoded_json(json_document):
             try:
-                json_document = json.loads(json_document)
-            except json.JSONDecodeError:
-                raise InvalidJSONDocument("A JSON string was passed to be mapped, but it could not be decoded")
+                json_document = (decoder or decode_json)(json_document)
+            except ValueError:
+                raise InvalidJSONDocument("An encoded JSON document was passed to be mapped, but it could not be "
+                                          "decoded")
 
         if not is_json_structure(json_document):
             raise JSONStructureError("JSON value to be mapped must be a structure (array/object)")
 
         logger.debug(f"Document Root Length: {len(json_document)}")
+        self.ignore_paths = tuple(ignore_paths or ())
         self.map = {}
         self.map_element(json_document, XPath([]))
 
+        if self.__lossy_float_found:
+            logger.debug("Integers too wide for orjson found, decoding again with the standard library")
+            self.map = {}
+            self.__check_lossy_floats = False
+            self.map_element(decode_json(encoded_document, exact=True), XPath([]))
+
     def __str__(self):
         return f"<JSONMap {self[XPath('')].value_hash} || {len(self.map) - 1} element(s)>"
 
@@ -97,24 +124,59 @@ class JSONMap:
             return None
 
     def map_element(self, raw_element, xpath, index=0, key=None, trailing_comma=False):
-        json_element = JSONElement(xpath, raw_element, array_index=index, object_key=key, trailing_comma=trailing_comma)
+        hashed_element = self.__prune_ignored(raw_element, xpath) if self.ignore_paths else raw_element
+        json_element = JSONElement(xpath, raw_element, array_index=index, object_key=key, trailing_comma=trailing_comma,
+                                   hashed_value=(None if hashed_element is raw_element else hashed_element))
         self.map[xpath] = json_element
 
         if json_element.json_type == "array":
-            array_range = range(len(json_element.value))
-
-            for i in array_range:
-                index_xpath = xpath.descend(i)
-                self.map_element(json_element.value[i], index_xpath, index=i, trailing_comma=((i + 1) in array_range))
+            children = [(i, xpath.descend(i)) for i in range(len(raw_element))]
         elif json_element.json_type == "object":
-            key_range = range(len(json_element.object_keys))
-            i = 0
-
-            for current_key in json_element.object_keys:
-                key_xpath = xpath.descend(current_key)
-                self.map_element(json_element.value[current_key], key_xpath, key=current_key,
-                                 trailing_comma=((i + 1) in key_range))
-                i = i + 1
+            children = [(key, xpath.descend(key)) for key in json_element.object_keys]
+        else:
+            if self.__check_lossy_floats and is_lossy_float(raw_element):
+                self.__lossy_float_found = True
+
+            return
+
+        # Trailing commas are based only on the children that are mapped, so that an ignored last child does not
+        # leave a comma behind on the child before it
+        if self.ignore_paths:
+            children = [child for child in children if not self.__is_ignored(child[1])]
+
+        last_child = len(children) - 1
+
+        for i, (child_key, child_xpath) in enumerate(children):
+            if json_element.json_type == "array":
+                self.map_element(raw_element[child_key], child_xpath, index=child_key, trailing_comma=(i < last_child))
+            else:
+                self.map_element(raw_element[child_key], child_xpath, key=child_key, trailing_comma=(i < last_child))
+
+    def __is_ignored(self, xpath):
+        for ipath in self.ignore_paths:
+            if ipath.matches_path(xpath):
+                return True
+
+        return False
+
+    def __prune_ignored(self, raw_element, xpath):
+        """Returns a copy of the raw value without its ignored descendants, or the raw value itself if none can exist"""
+        if not is_json_structure(raw_element) \
+                or not any(ipath.may_match_descendant(xpath) for ipath in self.ignore_paths):
+            return raw_element
+
+        if isinstance(raw_element, dict):
+            return {key: self.__prune_ignored(value, xpath.descend(key))
+                    for key, value in raw_element.items()
+                    if not self.__is_ignored(xpath.descend(key))}
+
+        return [self.__prune_ignored(raw_element[i], xpath.descend(i))
+                for i in range(len(raw_element))
+                if not self.__is_ignored(xpath.descend(i))]
+
+    def get_mapped_value(self, xpath):
+        """Returns the value of the element at `xpath` without its ignored descendants"""
+        return self.__prune_ignored(self.map[xpath].value, xpath)
 
     def xpaths(self):
         return self.map.keys()
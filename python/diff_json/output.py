@@ -0,0 +1,440 @@
+import html
+import json
+import logging
+from collections import deque
+from itertools import chain, islice, repeat, zip_longest
+from .pathfinding import XPath
+from .utility import py_to_json_type
+
+
+logger = logging.getLogger("diff_json")
+
+
+class DiffRow:
+    __slots__ = ["left_number", "left_op", "left_line", "right_number", "right_op", "right_line"]
+
+    def __init__(self, left_number, left_op, left_line, right_number, right_op, right_line):
+        self.left_number = left_number
+        self.left_op = left_op if left_line is not None else "  "
+        self.left_line = left_line
+        self.right_number = right_number
+        self.right_op = right_op if right_line is not None else "  "
+        self.right_line = right_line
+
+    def __str__(self):
+        return f"<DiffRow {self.left_number}:{self.left_op} || {self.right_number}:{self.right_op}>"
+
+    @property
+    def changed(self):
+        return (self.left_op + self.right_op).strip() != ""
+
+
+class DiffHunk:
+    __slots__ = ["rows", "left_start", "left_length", "right_start", "right_length"]
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.left_start, self.left_length = self.__get_range([row.left_number for row in rows])
+        self.right_start, self.right_length = self.__get_range([row.right_number for row in rows])
+
+    def __str__(self):
+        return self.header
+
+    def __len__(self):
+        return len(self.rows)
+
+    @property
+    def header(self):
+        return f"@@ -{self.left_start},{self.left_length} +{self.right_start},{self.right_length} @@"
+
+    @staticmethod
+    def __get_range(numbers):
+        numbers = [number for number in numbers if number is not None]
+
+        if len(numbers) == 0:
+            return 0, 0
+
+        return numbers[0], len(numbers)
+
+
+class _LineBlock:
+    """A fixed set of rows, used for the opening and closing lines of a structure that is diffed by descent"""
+
+    def __init__(self, lines, left_op="  ", right_op="  "):
+        self.lines = lines
+        self.left_op = left_op
+        self.right_op = right_op
+        self.changed = (left_op + right_op).strip() != ""
+        self.left_length = sum(1 for left, _ in lines if left is not None)
+        self.right_length = sum(1 for _, right in lines if right is not None)
+        self.length = len(lines)
+
+    def rows(self):
+        return iter(self.lines)
+
+    def reversed_rows(self):
+        return reversed(self.lines)
+
+
+class _ValueBlock:
+    """
+    The full pretty-printed value of one element on each side, whose lines are only generated on demand. The values are
+    passed separately from the elements, so that ignored descendants can be left out of them
+    """
+
+    def __init__(self, old_element, new_element, old_value, new_value, left_op="  ", right_op="  "):
+        self.old_element = old_element
+        self.new_element = new_element
+        self.old_value = old_value
+        self.new_value = new_value
+        self.left_op = left_op
+        self.right_op = right_op
+        self.changed = (left_op + right_op).strip() != ""
+        self.left_length = _count_lines(old_value) if old_element else 0
+        self.right_length = _count_lines(new_value) if new_element else 0
+        self.length = max(self.left_length, self.right_length)
+
+    def rows(self):
+        return zip_longest(self.__side_lines(self.old_element, self.old_value),
+                           self.__side_lines(self.new_element, self.new_value))
+
+    def reversed_rows(self):
+        left_lines = chain(repeat(None, self.length - self.left_length),
+                           self.__side_lines(self.old_element, self.old_value, reverse=True))
+        right_lines = chain(repeat(None, self.length - self.right_length),
+                            self.__side_lines(self.new_element, self.new_value, reverse=True))
+
+        return zip(left_lines, right_lines)
+
+    @staticmethod
+    def __side_lines(element, value, reverse=False):
+        if element is None:
+            return iter(())
+
+        generator = _value_lines_reversed if reverse else _value_lines
+
+        return generator(value, element.indentation, element.key, element.trailing_comma)
+
+
+class DiffOutput:
+    """
+    Base class for side-by-side views of a completed JSONDiff. Like `diff -U`, only hunks containing changes and a
+    limited number of surrounding context lines are rendered, and unchanged values that fall outside of that context
+    are counted but never pretty-printed
+
+    :param diff: a JSONDiff object, on which `run()` has already been called
+    :param context_lines: (optional, default `3`) the number of unchanged lines to show before and after each change.
+        If `None`, the entire document is rendered as a single hunk
+    """
+
+    def __init__(self, diff, context_lines=3):
+        self.diff = diff
+        self.context_lines = context_lines
+
+    def __str__(self):
+        return "".join(self.render())
+
+    def render(self):
+        """Generates the output in chunks: an opener, one chunk per hunk, and a closer"""
+        yield self._render_opener()
+
+        for hunk in self.hunks():
+            yield self._render_hunk(hunk)
+
+        yield self._render_closer()
+
+    def hunks(self):
+        """Generates a DiffHunk for each run of changes, merging runs separated by no more than twice the context"""
+        limit = self.context_lines
+        trailing_limit = float("inf") if limit is None else limit
+        numbers = [0, 0]
+        leading = deque(maxlen=limit)
+        pending = 0
+        trailing = 0
+        hunk = None
+
+        for block in self._walk(XPath([])):
+            if block.changed:
+                if hunk is not None and limit is not None and pending > limit:
+                    yield DiffHunk(hunk)
+                    hunk = None
+
+                if hunk is None:
+                    hunk = []
+
+                hunk.extend(leading)
+                leading.clear()
+                pending = 0
+                hunk.extend(self.__number_rows(block.rows(), numbers, block.left_op, block.right_op))
+                trailing = trailing_limit
+                continue
+
+            remaining = block.length
+            rows = block.rows()
+
+            if hunk is not None and trailing > 0:
+                taken = min(trailing, remaining)
+                hunk.extend(self.__number_rows(islice(rows, taken), numbers))
+                trailing = trailing - taken
+                remaining = remaining - taken
+
+            if remaining == 0:
+                continue
+
+            pending = pending + remaining
+
+            if limit is not None and remaining > limit:
+                skip_start = block.length - remaining
+                skip_end = block.length - limit
+                numbers[0] += max(0, min(skip_end, block.left_length) - skip_start)
+                numbers[1] += max(0, min(skip_end, block.right_length) - skip_start)
+                rows = reversed(list(islice(block.reversed_rows(), limit)))
+
+            leading.extend(self.__number_rows(rows, numbers))
+
+        if hunk is not None:
+            yield DiffHunk(hunk)
+        elif limit is None and len(leading) > 0:
+            yield DiffHunk(list(leading))
+
+    def _walk(self, xpath):
+        old_element = self.diff.old_map[xpath]
+        new_element = self.diff.new_map[xpath]
+
+        # Ignored paths are left out of both maps, and have nothing to show
+        if old_element is None and new_element is None:
+            return
+
+        operations = {operation['op'] for operation in self.diff.diff.get(xpath, [])}
+
+        # The children of a structure that was emptied or filled are all removed or added, and are shown as part of
+        # rendering the whole structure
+        if old_element is not None and new_element is not None and old_element.json_type == new_element.json_type \
+                and old_element.value_hash != new_element.value_hash:
+            if new_element.length == 0:
+                operations.add("remove")
+            elif old_element.length == 0:
+                operations.add("add")
+
+        left_op, right_op = self._get_operators(operations)
+
+        if self.__render_whole(xpath, old_element, new_element, operations, left_op + right_op):
+            # Hashes ignore the ignored descendants of a structure, so the values rendered leave them out as well
+            old_value = self.diff.old_map.get_mapped_value(xpath) if old_element else None
+            new_value = self.diff.new_map.get_mapped_value(xpath) if new_element else None
+            yield _ValueBlock(old_element, new_element, old_value, new_value, left_op, right_op)
+            return
+
+        open_char, close_char = ("[", "]") if old_element.json_type == "array" else ("{", "}")
+        yield _LineBlock([(_line_prefix(old_element.indentation, old_element.key) + open_char,
+                           _line_prefix(new_element.indentation, new_element.key) + open_char)],
+                         left_op, right_op)
+
+        if old_element.json_type == "array":
+            children = range(max(old_element.length, new_element.length))
+        else:
+            children = sorted(set(old_element.object_keys) | set(new_element.object_keys))
+
+        for child in children:
+            yield from self._walk(xpath.descend(child))
+
+        yield _LineBlock([("  " * old_element.indentation + close_char + ("," if old_element.trailing_comma else ""),
+                           "  " * new_element.indentation + close_char + ("," if new_element.trailing_comma else ""))])
+
+    def __render_whole(self, xpath, old_element, new_element, operations, operators):
+        return (old_element is None
+                or new_element is None
+                or old_element.value_hash == new_element.value_hash
+                or old_element.json_type != new_element.json_type
+                or old_element.json_type == "primitive"
+                or old_element.length == 0
+                or new_element.length == 0
+                or "replace" in operations
+                or (xpath in self.diff.ignored and operators.strip() == ""))
+
+    @staticmethod
+    def _get_operators(operations):
+        left_op = ("M" if "send" in operations else " ") + ("-" if operations & {"remove", "replace"} else " ")
+        right_op = ("M" if "move" in operations else " ") + ("+" if operations & {"add", "replace"} else " ")
+
+        return left_op, right_op
+
+    @staticmethod
+    def __number_rows(rows, numbers, left_op="  ", right_op="  "):
+        numbered = []
+
+        for left_line, right_line in rows:
+            left_number = right_number = None
+
+            if left_line is not None:
+                numbers[0] += 1
+                left_number = numbers[0]
+
+            if right_line is not None:
+                numbers[1] += 1
+                right_number = numbers[1]
+
+            numbered.append(DiffRow(left_number, left_op, left_line, right_number, right_op, right_line))
+
+        return numbered
+
+    def _render_opener(self):
+        return ""
+
+    def _render_hunk(self, hunk):
+        raise NotImplementedError
+
+    def _render_closer(self):
+        return ""
+
+
+class TextOutput(DiffOutput):
+    """
+    Plain text side-by-side view of a completed JSONDiff
+
+    :param diff: a JSONDiff object, on which `run()` has already been called
+    :param context_lines: (optional, default `3`) see DiffOutput
+    :param column_width: (optional, default `60`) the width to which lines in the left column are padded
+    """
+
+    def __init__(self, diff, context_lines=3, column_width=60):
+        super().__init__(diff, context_lines=context_lines)
+        self.column_width = column_width
+
+    def _render_hunk(self, hunk):
+        number_width = len(str(max(hunk.left_start + hunk.left_length, hunk.right_start + hunk.right_length)))
+        lines = [hunk.header]
+
+        for row in hunk.rows:
+            left_number = "" if row.left_number is None else row.left_number
+            right_number = "" if row.right_number is None else row.right_number
+            left_line = row.left_line or ""
+            right_line = row.right_line or ""
+            lines.append(f"{left_number:>{number_width}} {row.left_op} {left_line:<{self.column_width}} | "
+                         f"{right_number:>{number_width}} {row.right_op} {right_line}".rstrip())
+
+        return "\n".join(lines) + "\n"
+
+
+class HtmlOutput(DiffOutput):
+    """
+    HTML table side-by-side view of a completed JSONDiff, using the same CSS class names as the Ruby gem
+
+    :param diff: a JSONDiff object, on which `run()` has already been called
+    :param context_lines: (optional, default `3`) see DiffOutput
+    :param table_id: (optional, default `"diff_json_view_0"`) the id attribute of the generated table
+    """
+
+    def __init__(self, diff, context_lines=3, table_id="diff_json_view_0"):
+        super().__init__(diff, context_lines=context_lines)
+        self.table_id = table_id
+
+    def _render_opener(self):
+        return f"<table id=\"{html.escape(self.table_id)}\" class=\"diff-json-view diff-json-full-view\">\n"
+
+    def _render_hunk(self, hunk):
+        lines = [f"<tr class=\"diff-json-view-hunk\"><td colspan=\"7\"><pre>{hunk.header}</pre></td></tr>"]
+
+        for row in hunk.rows:
+            lines.append("<tr class=\"diff-json-view-line\">"
+                         f"{self.__side_cells(row.left_number, row.left_op, row.left_line)}"
+                         "<td class=\"diff-json-view-column-break\"></td>"
+                         f"{self.__side_cells(row.right_number, row.right_op, row.right_line)}"
+                         "</tr>")
+
+        return "\n".join(lines) + "\n"
+
+    def _render_closer(self):
+        return "</table>\n"
+
+    @classmethod
+    def __side_cells(cls, number, operators, line):
+        if line is None:
+            return ("<td class=\"diff-json-view-line-number\"></td>"
+                    "<td class=\"diff-json-view-line-operator\"><pre></pre></td>"
+                    "<td class=\"diff-json-view-line-content\"><pre class=\"diff-json-line-breaker\"></pre></td>")
+
+        return (f"<td class=\"diff-json-view-line-number\">{number}</td>"
+                f"<td class=\"diff-json-view-line-operator\"><pre>{operators}</pre></td>"
+                "<td class=\"diff-json-view-line-content\">"
+                f"<pre class=\"{cls.__content_classes(operators)}\">{html.escape(line)}</pre></td>")
+
+    @staticmethod
+    def __content_classes(operators):
+        if "+" in operators:
+            return "diff-json-line-breaker diff-json-content-ins"
+        elif "-" in operators:
+            return "diff-json-line-breaker diff-json-content-del"
+        elif "M" in operators:
+            return "diff-json-line-breaker diff-json-content-mov"
+
+        return "diff-json-line-breaker"
+
+
+def _line_prefix(indentation, key):
+    prefix = "  " * indentation
+
+    if key is not None:
+        prefix = prefix + f"{json.dumps(key)}: "
+
+    return prefix
+
+
+def _count_lines(value):
+    if py_to_json_type(value) == "primitive" or len(value) == 0:
+        return 1
+
+    children = value if py_to_json_type(value) == "array" else value.values()
+
+    return 2 + sum(map(_count_lines, children))
+
+
+def _value_lines(value, indentation, key=None, trailing_comma=False):
+    json_type = py_to_json_type(value)
+    comma = "," if trailing_comma else ""
+
+    if json_type == "primitive" or len(value) == 0:
+        yield f"{_line_prefix(indentation, key)}{json.dumps(value)}{comma}"
+        return
+
+    if json_type == "array":
+        yield f"{_line_prefix(indentation, key)}["
+
+        for i in range(len(value)):
+            yield from _value_lines(value[i], indentation + 1, trailing_comma=(i + 1) < len(value))
+
+        yield f"{'  ' * indentation}]{comma}"
+    else:
+        keys = sorted(value.keys())
+        yield f"{_line_prefix(indentation, key)}{{"
+
+        for i in range(len(keys)):
+            yield from _value_lines(value[keys[i]], indentation + 1, key=keys[i], trailing_comma=(i + 1) < len(keys))
+
+        yield f"{'  ' * indentation}}}{comma}"
+
+
+def _value_lines_reversed(value, indentation, key=None, trailing_comma=False):
+    json_type = py_to_json_type(value)
+    comma = "," if trailing_comma else ""
+
+    if json_type == "primitive" or len(value) == 0:
+        yield f"{_line_prefix(indentation, key)}{json.dumps(value)}{comma}"
+        return
+
+    if json_type == "array":
+        yield f"{'  ' * indentation}]{comma}"
+
+        for i in reversed(range(len(value))):
+            yield from _value_lines_reversed(value[i], indentation + 1, trailing_comma=(i + 1) < len(value))
+
+        yield f"{_line_prefix(indentation, key)}["
+    else:
+        keys = sorted(value.keys())
+        yield f"{'  ' * indentation}}}{comma}"
+
+        for i in reversed(range(len(keys))):
+            yield from _value_lines_reversed(value[keys[i]], indentation + 1, key=keys[i],
+                                             trailing_comma=(i + 1) < len(keys))
+
+        yield f"{_line_prefix(indentation, key)}{{"
@@ -109,6 +109,20 @@ class XPathMatch(Path):
 
         return False
 
+    def may_match_descendant(self, xpath):
+        """Indicates whether any descendant of `xpath` could be matched, without needing to know the descendants"""
+        shared_length = min(len(self), len(xpath))
+
+        if self.segments[0:shared_length] != xpath.segments[0:shared_length]:
+            return False
+
+        if len(xpath) < len(self):
+            return True
+        elif self.wildcard == "*":
+            return len(xpath) == len(self)
+
+        return self.wildcard == "**"
+
     def find_matches(self, xpaths):
         return [xpath for xpath in xpaths if self.matches_path(xpath)]
 
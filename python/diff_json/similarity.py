@@ -0,0 +1,111 @@
+import hashlib
+import json
+import random
+from .utility import py_to_json_type
+
+
+MERSENNE_PRIME = (1 << 61) - 1
+SKETCH_SIZE = 32
+MIN_BAND_RECALL = 0.95
+MAX_BUCKET_SIZE = 32
+
+_random = random.Random(0)
+_PERMUTATIONS = [(_random.randrange(1, MERSENNE_PRIME), _random.randrange(0, MERSENNE_PRIME))
+                 for _ in range(SKETCH_SIZE)]
+
+
+def leaf_tokens(value, relative_path=()):
+    """
+    Yields a hash for each leaf of a JSON value, combining the leaf's path relative to the value with the leaf value.
+    The built-in `hash()` of strings changes between processes, so a digest is used to keep sketches reproducible
+    """
+    json_type = py_to_json_type(value)
+
+    if json_type == "array" and len(value) > 0:
+        for i in range(len(value)):
+            yield from leaf_tokens(value[i], relative_path + (i,))
+    elif json_type == "object" and len(value) > 0:
+        for key in value:
+            yield from leaf_tokens(value[key], relative_path + (key,))
+    else:
+        token = json.dumps([relative_path, type(value).__name__, value])
+        yield int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def minhash_sketch(value):
+    """Returns a MinHash sketch of the set of leaf tokens of a JSON value"""
+    tokens = set(leaf_tokens(value))
+
+    return tuple(min((a * token + b) % MERSENNE_PRIME for token in tokens) for a, b in _PERMUTATIONS)
+
+
+def sketch_similarity(sketch1, sketch2):
+    """Estimates the Jaccard similarity of the token sets behind two sketches"""
+    return sum(1 for h1, h2 in zip(sketch1, sketch2) if h1 == h2) / SKETCH_SIZE
+
+
+def band_recall(similarity, band_rows):
+    """The probability that two sketches of the given similarity share at least one band of `band_rows` rows"""
+    return 1 - (1 - similarity ** band_rows) ** (SKETCH_SIZE // band_rows)
+
+
+def get_band_rows(threshold):
+    """
+    Returns the largest band size for which pairs exactly at `threshold` similarity share a band with a probability of
+    at least MIN_BAND_RECALL. Larger bands produce fewer candidate pairs to compare, but miss more similar pairs
+    """
+    for band_rows in (32, 16, 8, 4, 2):
+        if band_recall(threshold, band_rows) >= MIN_BAND_RECALL:
+            return band_rows
+
+    return 1
+
+
+def find_similar_pairs(old_sketches, new_sketches, threshold):
+    """
+    Pairs the keys of two {key -> sketch} dicts whose sketches are at least `threshold` similar. Candidates are found by
+    bucketing bands of each sketch (locality-sensitive hashing), so only sketches sharing a band are ever compared. The
+    band size is chosen from the threshold (see `get_band_rows`). Buckets holding more than MAX_BUCKET_SIZE old keys are
+    skipped, which keeps the number of candidates linear in the number of keys. Each key is used in at most one pair,
+    with the most similar pairs chosen first
+
+    :return: a list of (similarity, old_key, new_key) tuples, sorted by key
+    """
+    band_rows = get_band_rows(threshold)
+    buckets = {}
+
+    for old_key, sketch in old_sketches.items():
+        for band in range(0, SKETCH_SIZE, band_rows):
+            buckets.setdefault((band, sketch[band:band + band_rows]), []).append(old_key)
+
+    candidates = set()
+
+    # A band shared by that many elements is almost always made up of leaves that most elements have in common (e.g. a
+    # constant "type" field), so it says little about which of them are similar. Comparing every element in such a
+    # bucket would make the candidates grow quadratically, while the other bands of similar elements still pair them
+    for new_key, sketch in new_sketches.items():
+        for band in range(0, SKETCH_SIZE, band_rows):
+            bucket = buckets.get((band, sketch[band:band + band_rows]), ())
+
+            if len(bucket) <= MAX_BUCKET_SIZE:
+                candidates.update((old_key, new_key) for old_key in bucket)
+
+    scored = []
+
+    for old_key, new_key in candidates:
+        similarity = sketch_similarity(old_sketches[old_key], new_sketches[new_key])
+
+        if similarity >= threshold:
+            scored.append((-similarity, old_key, new_key))
+
+    paired_old = set()
+    paired_new = set()
+    pairs = []
+
+    for negative_similarity, old_key, new_key in sorted(scored):
+        if old_key not in paired_old and new_key not in paired_new:
+            paired_old.add(old_key)
+            paired_new.add(new_key)
+            pairs.append((-negative_similarity, old_key, new_key))
+
+    return sorted(pairs, key=lambda pair: (pair[1], pair[2]))
@@ -1,7 +1,52 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# orjson silently decodes integers outside the int64/uint64 range as floats, which are always whole numbers of at least
+# this magnitude
+LOSSY_FLOAT_MIN = float(1 << 63)
+
+
 def is_json_structure(value):
     return isinstance(value, (list, tuple, dict))
 
 
+def is_encoded_json(value):
+    return isinstance(value, (str, bytes, bytearray, memoryview))
+
+
+def decode_json(json_document, exact=False):
+    """
+    Decodes a JSON document with orjson when it is installed, or with the standard library json module. Passing
+    `exact=True` always uses the standard library, which keeps integers of any width exact (see `is_lossy_float`)
+    """
+    if orjson is not None and not exact:
+        try:
+            return orjson.loads(json_document)
+        except orjson.JSONDecodeError:
+            # orjson rejects some documents the standard library accepts (e.g. NaN and Infinity), so those fall through
+            # to the standard library, which raises its own error if the document really is invalid
+            pass
+
+    if isinstance(json_document, memoryview):
+        json_document = json_document.tobytes()
+
+    return json.loads(json_document)
+
+
+def is_lossy_float(value):
+    """
+    Whether a decoded value may be an integer that orjson could not hold exactly. Checking the decoded values is much
+    cheaper than scanning the encoded document beforehand, and such values are rare enough that decoding the whole
+    document again with `decode_json(..., exact=True)` when one is found costs little
+    """
+    return isinstance(value, float) and abs(value) >= LOSSY_FLOAT_MIN and value.is_integer()
+
+
 def py_to_json_type(value):
     if isinstance(value, (list, tuple)):
         return "array"
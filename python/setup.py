@@ -14,5 +14,6 @@ setup(
     author=about["__author__"],
     author_email=about["__author_email__"],
     packages=["diff_json"],
-    package_dir={"diff_json": "diff_json"}
+    package_dir={"diff_json": "diff_json"},
+    extras_require={"fast": ["orjson"]}
 )
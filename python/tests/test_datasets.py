@@ -0,0 +1,80 @@
+import io
+import pytest
+
+from diff_json.datasets import NDJSONDiff
+from diff_json.exceptions import InvalidNDJSONRecord
+
+def write_ndjson(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_identical_collections(tmp_path):
+    lines = ['{"id": 1, "a": 1}', '{"id": 2, "a": 2}']
+    old_path = write_ndjson(tmp_path / "old.ndjson", lines)
+    new_path = write_ndjson(tmp_path / "new.ndjson", list(reversed(lines)))
+    assert list(NDJSONDiff(old_path, new_path).run()) == []
+
+def test_added_removed_and_changed_records(tmp_path):
+    old_path = write_ndjson(tmp_path / "old.ndjson", ['{"id": 3, "a": 1}', '{"id": 1, "a": 1}', '{"id": 2, "a": 2}'])
+    new_path = write_ndjson(tmp_path / "new.ndjson", ['{"id": 4, "a": 4}', '{"a": 5, "id": 2}', '', '{"id": 1, "a": 1}'])
+    operations = list(NDJSONDiff(old_path, new_path, run_length=1, temp_dir=str(tmp_path)).run())
+    assert operations == [
+        {'op': 'change', 'key': 2, 'patch': [{'op': 'replace', 'path': '/a', 'value': 5}]},
+        {'op': 'remove', 'key': 3},
+        {'op': 'add', 'key': 4, 'value': {'id': 4, 'a': 4}}
+    ]
+    assert [path.name for path in tmp_path.iterdir() if path.is_dir()] == []
+
+def test_reformatted_record_is_not_diffed(monkeypatch):
+    diffed = []
+    monkeypatch.setattr("diff_json.datasets.JSONDiff", lambda *args, **kwargs: diffed.append(args))
+    old_lines = io.StringIO('{"id": "x", "a": {"b": 1, "c": 2}}\n')
+    new_lines = io.BytesIO(b'{"a":{"c":2,"b":1},"id":"x"}\n')
+    assert list(NDJSONDiff(old_lines, new_lines).run()) == []
+    assert diffed == []
+
+def test_ignored_changes_are_skipped():
+    old_lines = ['{"id": 1, "meta": {"updated": 1}, "a": 1}']
+    new_lines = ['{"id": 1, "meta": {"updated": 2}, "a": 1}']
+    assert list(NDJSONDiff(old_lines, new_lines, ignore_paths=["/meta/**"]).run()) == []
+
+def test_string_and_integer_keys():
+    operations = list(NDJSONDiff(['{"id": "1"}'], ['{"id": 1}']).run())
+    assert operations == [{'op': 'remove', 'key': '1'}, {'op': 'add', 'key': 1, 'value': {'id': 1}}]
+
+def test_custom_key_field():
+    operations = list(NDJSONDiff(['{"sku": "a", "n": 1}'], ['{"sku": "a", "n": 2}'], key_field="sku").run())
+    assert operations == [{'op': 'change', 'key': 'a', 'patch': [{'op': 'replace', 'path': '/n', 'value': 2}]}]
+
+def test_missing_key_field():
+    with pytest.raises(InvalidNDJSONRecord):
+        list(NDJSONDiff(['{"id": 1}', '{"name": "x"}'], []).run())
+
+def test_invalid_line():
+    with pytest.raises(InvalidNDJSONRecord):
+        list(NDJSONDiff([], ['{"id": 1']).run())
+
+def test_duplicate_keys():
+    with pytest.raises(InvalidNDJSONRecord):
+        list(NDJSONDiff(['{"id": 1}', '{"id": 1}'], [], run_length=1).run())
+
+def test_multi_pass_merge(tmp_path):
+    old_lines = [f'{{"id": {i}, "a": 1}}' for i in range(50)]
+    new_lines = [f'{{"id": {i}, "a": {1 if i % 7 else 2}}}' for i in reversed(range(1, 51))]
+    operations = list(NDJSONDiff(old_lines, new_lines, run_length=3, merge_fan_in=2, temp_dir=str(tmp_path)).run())
+    assert operations == list(NDJSONDiff(old_lines, new_lines).run())
+    changed_keys = sorted(operation['key'] for operation in operations if operation['op'] == 'change')
+    assert changed_keys == [7, 14, 21, 28, 35, 42, 49]
+    assert [operation['key'] for operation in operations if operation['op'] != 'change'] == [0, 50]
+
+def test_multi_pass_merge_duplicate_keys():
+    with pytest.raises(InvalidNDJSONRecord):
+        list(NDJSONDiff([f'{{"id": {i % 4}}}' for i in range(8)], [], run_length=1, merge_fan_in=3).run())
+
+def test_wide_integer_records():
+    old_lines = ['{"id": 1, "a": 18446744073709551616}']
+    new_lines = ['{"id": 1, "a": 18446744073709551617}', '{"id": 2, "a": 18446744073709551617}']
+    assert list(NDJSONDiff(old_lines, new_lines).run()) == [
+        {'op': 'change', 'key': 1, 'patch': [{'op': 'replace', 'path': '/a', 'value': 18446744073709551617}]},
+        {'op': 'add', 'key': 2, 'value': {'id': 2, 'a': 18446744073709551617}}
+    ]
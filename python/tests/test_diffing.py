@@ -173,3 +173,84 @@ def test_diff_type_replace(mocker):
     json_diff.run()
     patch = json_diff.get_patch()
     assert patch
+
+def test_ignored_subtree_change_leaves_parent_equal():
+    json_diff = JSONDiff({"key": [{"id": 1, "generated": "x"}], "other": 1},
+                         {"key": [{"id": 1, "generated": "y"}], "other": 2}, ignore_paths=["/key/0/generated"])
+    json_diff.run()
+    assert json_diff.new_map[XPath(["key", 0, "generated"])] is None
+    assert json_diff.get_patch() == [{'op': 'replace', 'path': '/other', 'value': 2}]
+
+def test_ignored_subtree_kept_in_replace_value():
+    json_diff = JSONDiff({"key": {"generated": "x"}}, {"key": [1]}, ignore_paths=["/key/generated"])
+    json_diff.run()
+    assert json_diff.get_patch() == [{'op': 'replace', 'path': '/key', 'value': [1]}]
+
+def test_run_bytes_documents():
+    json_diff = JSONDiff(b'{"key":1}', memoryview(b'{"key":2}'))
+    json_diff.run()
+    assert json_diff.get_patch() == [{'op': 'replace', 'path': '/key', 'value': 2}]
+
+def test_match_modified_array_elements():
+    moved = {"id": 1, "name": "a", "tags": [1, 2], "x": 1, "y": 2, "z": 3}
+    old_json = {"items": [moved, {"id": 2}]}
+    new_json = {"items": [{"id": 2}, {"id": 3}, dict(moved, z=4)]}
+    json_diff = JSONDiff(old_json, new_json, match_modified_array_elements=True)
+    json_diff.run()
+    patch = json_diff.get_patch()
+    move_index = patch.index({'op': 'move', 'path': '/items/2', 'from': '/items/0'})
+    assert patch[move_index + 1] == {'op': 'replace', 'path': '/items/2/z', 'value': 4}
+    assert {'op': 'add', 'path': '/items/2', 'value': dict(moved, z=4)} not in patch
+
+def test_match_modified_array_elements_below_threshold():
+    old_json = {"items": [{"a": 1, "b": 2}, {"c": 3}]}
+    new_json = {"items": [{"c": 3}, {"a": 5, "b": 6}]}
+    json_diff = JSONDiff(old_json, new_json, match_modified_array_elements=True, array_similarity_threshold=0.9)
+    json_diff.run()
+    assert {'op': 'move', 'path': '/items/1', 'from': '/items/0'} not in json_diff.get_patch()
+
+def test_parallel_depth_matches_serial_diff():
+    old_json = {
+        "same": {"a": list(range(10))},
+        "objects": {"a": 1, "b": {"c": [1, 2, 3]}, "b2": [{"d": 1}], "gone": True},
+        "arrays": [{"first": "thing"}, {"second": "thing"}],
+        "generated": {"x": 1, "y": {"z": 2}},
+        "type_change": {"a": 1},
+        "removed": [1]
+    }
+    new_json = {
+        "same": {"a": list(range(10))},
+        "objects": {"a": 2, "b": {"c": [1, 3]}, "b2": [{"d": 2}], "new": None},
+        "arrays": [{"second": "thing"}, {"first": "thing"}, {"third": "thing"}],
+        "generated": {"x": 5, "y": {"z": 3}},
+        "type_change": [1],
+        "added": {"a": 1}
+    }
+    options = {"ignore_paths": ["/generated/y/**"], "track_structure_updates": True}
+    serial_diff = JSONDiff(old_json, new_json, **options)
+    serial_diff.run()
+    for parallel_depth in (1, 2):
+        parallel_diff = JSONDiff(old_json, new_json, parallel_depth=parallel_depth, max_workers=2, **options)
+        parallel_diff.run()
+        assert list(parallel_diff.diff.items()) == list(serial_diff.diff.items())
+        assert parallel_diff.get_patch() == serial_diff.get_patch()
+
+def test_ignore_root_descendants():
+    json_diff = JSONDiff({"key": 1}, {"key": 2, "other": [1]}, ignore_paths=["/**"])
+    json_diff.run()
+    assert json_diff.ignored == {XPath([])}
+    assert json_diff.get_patch() == []
+
+def test_ignore_path_without_wildcard_excludes_descendants():
+    for ignore_paths in (["/k"], ["/k/*"]):
+        json_diff = JSONDiff({"k": {"a": {"b": 1}}}, {"k": {"a": {"b": 2}}}, ignore_paths=ignore_paths)
+        json_diff.run()
+        assert json_diff.get_patch() == []
+
+def test_run_wide_integers():
+    json_diff = JSONDiff('{"id": 18446744073709551616}', '{"id": 18446744073709551617}')
+    json_diff.run()
+    assert json_diff.get_patch() == [{'op': 'replace', 'path': '/id', 'value': 18446744073709551617}]
+    json_diff = JSONDiff('{"id": 18446744073709551617}', {"id": 18446744073709551617})
+    json_diff.run()
+    assert json_diff.get_patch() == []
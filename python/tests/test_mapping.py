@@ -1,7 +1,7 @@
 import pytest
 
 from diff_json.mapping import JSONElement, JSONMap
-from diff_json.pathfinding import XPath
+from diff_json.pathfinding import XPath, XPathMatch
 from diff_json.exceptions import InvalidJSONDocument, JSONStructureError
 
 def test_json_element_incompatible_json_type(mocker):
@@ -38,3 +38,38 @@ def test_json_map_get_item_not_found():
     json_map = JSONMap('{"key":"value"}')
     s = json_map["something_weird"]
     assert s == None
+
+def test_json_map_ignore_paths_not_mapped():
+    json_map = JSONMap({"keep": 1, "components": {"a": [1, 2]}}, ignore_paths=[XPathMatch.from_path_string("/components/*")])
+    assert json_map[XPath(["components"])]
+    assert json_map[XPath(["components", "a"])] is None
+    assert json_map[XPath(["components", "a", 0])] is None
+    assert json_map[XPath(["keep"])]
+
+def test_json_map_ignore_paths_excluded_from_hash():
+    ignore_paths = [XPathMatch.from_path_string("/components/**"), XPathMatch.from_path_string("/list/1")]
+    old_map = JSONMap({"list": [1, 2, 3], "components": {"a": 1}}, ignore_paths=ignore_paths)
+    new_map = JSONMap({"list": [1, 5, 3], "components": {"a": 2, "b": 3}}, ignore_paths=ignore_paths)
+    assert old_map[XPath([])] == new_map[XPath([])]
+    assert old_map[XPath(["list"])].value == [1, 2, 3]
+
+def test_json_map_bytes_like_documents():
+    for document in (b'{"key":"value"}', bytearray(b'{"key":"value"}'), memoryview(b'{"key":"value"}')):
+        json_map = JSONMap(document)
+        assert json_map[XPath(["key"])].value == "value"
+
+def test_json_map_invalid_document_bytes():
+    with pytest.raises(InvalidJSONDocument):
+        JSONMap(b'{"key":')
+
+def test_json_map_custom_decoder():
+    decoded = []
+    json_map = JSONMap(b'{"key":"value"}', decoder=lambda document: decoded.append(document) or {"other": 1})
+    assert decoded == [b'{"key":"value"}']
+    assert json_map[XPath(["other"])].value == 1
+
+def test_json_map_wide_integers_exact():
+    json_map = JSONMap(b'{"id": 18446744073709551617, "list": [-9223372036854775809, 1e19]}')
+    assert json_map[XPath(["id"])].value == 18446744073709551617
+    assert json_map[XPath(["list", 0])].value == -9223372036854775809
+    assert json_map[XPath(["list", 1])].value == 1e19
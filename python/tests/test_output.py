@@ -0,0 +1,109 @@
+import pytest
+
+from diff_json.diffing import JSONDiff
+from diff_json.output import DiffOutput, HtmlOutput, TextOutput
+
+
+def run_diff(old_json, new_json, **kwargs):
+    json_diff = JSONDiff(old_json, new_json, **kwargs)
+    json_diff.run()
+    return json_diff
+
+def test_no_changes_renders_no_hunks():
+    output = TextOutput(run_diff({"key": [1, 2, 3]}, {"key": [1, 2, 3]}))
+    assert list(output.hunks()) == []
+    assert str(output) == ""
+
+def test_no_changes_full_context_renders_document():
+    hunks = list(TextOutput(run_diff({"key": 1}, {"key": 1}), context_lines=None).hunks())
+    assert len(hunks) == 1
+    assert [row.left_line for row in hunks[0].rows] == ['{', '  "key": 1', '}']
+
+def test_replace_primitive_with_context():
+    hunks = list(TextOutput(run_diff({"a": 1, "b": 2, "c": 3}, {"a": 1, "b": 4, "c": 3}), context_lines=1).hunks())
+    assert len(hunks) == 1
+    assert hunks[0].header == "@@ -2,3 +2,3 @@"
+    rows = hunks[0].rows
+    assert [row.left_line for row in rows] == ['  "a": 1,', '  "b": 2,', '  "c": 3']
+    assert [row.right_line for row in rows] == ['  "a": 1,', '  "b": 4,', '  "c": 3']
+    assert [row.changed for row in rows] == [False, True, False]
+    assert rows[1].left_op == " -"
+    assert rows[1].right_op == " +"
+
+def test_large_unchanged_value_is_skipped():
+    old_json = {"a": list(range(1000)), "b": 1}
+    new_json = {"a": list(range(1000)), "b": 2}
+    hunks = list(TextOutput(run_diff(old_json, new_json), context_lines=2).hunks())
+    assert len(hunks) == 1
+    assert hunks[0].header == "@@ -1002,4 +1002,4 @@"
+    assert [row.left_line for row in hunks[0].rows] == ['    999', '  ],', '  "b": 1', '}']
+
+def test_distant_changes_split_into_hunks():
+    old_json = {"a": 1, "big": list(range(20)), "z": 1}
+    new_json = {"a": 2, "big": list(range(20)), "z": 2}
+    hunks = list(TextOutput(run_diff(old_json, new_json), context_lines=3).hunks())
+    assert len(hunks) == 2
+    assert hunks[0].header == "@@ -1,5 +1,5 @@"
+    assert hunks[1].header == "@@ -22,5 +22,5 @@"
+
+def test_nearby_changes_merge_into_one_hunk():
+    old_json = {"a": 1, "b": 0, "c": 0, "d": 1}
+    new_json = {"a": 2, "b": 0, "c": 0, "d": 2}
+    hunks = list(TextOutput(run_diff(old_json, new_json), context_lines=1).hunks())
+    assert len(hunks) == 1
+    assert len(hunks[0]) == 6
+
+def test_added_structure_is_padded():
+    hunks = list(TextOutput(run_diff({"a": 1}, {"a": 1, "key": {"more": "stuff"}}), context_lines=0).hunks())
+    rows = hunks[0].rows
+    assert [row.left_line for row in rows] == [None, None, None]
+    assert [row.right_line for row in rows] == ['  "key": {', '    "more": "stuff"', '  }']
+    assert [row.right_number for row in rows] == [3, 4, 5]
+    assert all(row.left_op == "  " for row in rows)
+
+def test_array_move_operators():
+    json_diff = run_diff({"key": [{"first": "thing"}, {"second": "thing"}]},
+                         {"key": [{"second": "thing"}, {"first": "thing"}]})
+    rows = list(TextOutput(json_diff, context_lines=0).hunks())[0].rows
+    assert rows[0].left_op == "M "
+    assert rows[0].right_op == "M "
+
+def test_text_render_chunks():
+    chunks = list(TextOutput(run_diff({"a": 1}, {"a": 2}), column_width=10).render())
+    assert chunks == ["", "@@ -1,3 +1,3 @@\n1    {          | 1    {\n2  -   \"a\": 1   | 2  +   \"a\": 2\n3    }          | 3    }\n", ""]
+
+def test_html_render_escapes_content():
+    markup = str(HtmlOutput(run_diff({"a": "<b>"}, {"a": "&"}), table_id="view"))
+    assert markup.startswith('<table id="view"')
+    assert markup.endswith("</table>\n")
+    assert "&quot;&lt;b&gt;&quot;" in markup
+    assert "diff-json-content-del" in markup
+    assert "diff-json-content-ins" in markup
+
+def test_base_output_requires_hunk_renderer():
+    with pytest.raises(NotImplementedError):
+        str(DiffOutput(run_diff({"a": 1}, {"a": 2})))
+
+def test_empty_structure_rendered_whole():
+    hunks = list(TextOutput(run_diff({"c": {}}, {"c": {"e": True}}), context_lines=None).hunks())
+    rows = hunks[0].rows
+    assert [row.changed for row in rows] == [False, True, True, True, False]
+    assert [row.left_line for row in rows] == ['{', '  "c": {}', None, None, '}']
+    assert [row.right_line for row in rows] == ['{', '  "c": {', '    "e": true', '  }', '}']
+    assert [row.left_number for row in rows] == [1, 2, None, None, 3]
+
+def test_ignored_last_key_leaves_no_trailing_comma():
+    json_diff = run_diff({"a": 1, "b": 1, "z": 1}, {"a": 2, "b": 1, "z": 2}, ignore_paths=["/z"])
+    rows = list(TextOutput(json_diff, context_lines=None).hunks())[0].rows
+    assert [row.left_line for row in rows] == ['{', '  "a": 1,', '  "b": 1', '}']
+    assert [row.right_line for row in rows] == ['{', '  "a": 2,', '  "b": 1', '}']
+
+def test_equal_structure_with_ignored_descendants_rendered_without_them():
+    json_diff = run_diff({"a": {"gen": list(range(10)), "k": 1}, "z": 1}, {"a": {"gen": [], "k": 1}, "z": 2},
+                         ignore_paths=["/a/gen"])
+    hunks = list(TextOutput(json_diff, context_lines=1).hunks())
+    assert [hunk.header for hunk in hunks] == ["@@ -4,3 +4,3 @@"]
+    rows = list(TextOutput(json_diff, context_lines=None).hunks())[0].rows
+    assert [row.left_line for row in rows] == ['{', '  "a": {', '    "k": 1', '  },', '  "z": 1', '}']
+    assert [row.right_line for row in rows] == ['{', '  "a": {', '    "k": 1', '  },', '  "z": 2', '}']
+    assert [row.left_number for row in rows] == [row.right_number for row in rows] == [1, 2, 3, 4, 5, 6]
@@ -19,3 +19,11 @@ def test_xpath_match_not_matches_path_with_weird_wildcard():
     xpath_match = XPathMatch(["**"], "***")
     xpath = XPath(["**"])
     assert not xpath_match.matches_path(xpath)
+
+def test_xpath_match_may_match_descendant():
+    assert XPathMatch.from_path_string("/a/b/**").may_match_descendant(XPath([]))
+    assert XPathMatch.from_path_string("/a/b/**").may_match_descendant(XPath(["a", "b", "c"]))
+    assert not XPathMatch.from_path_string("/a/b/**").may_match_descendant(XPath(["a", "c"]))
+    assert XPathMatch.from_path_string("/a/*").may_match_descendant(XPath(["a"]))
+    assert not XPathMatch.from_path_string("/a/*").may_match_descendant(XPath(["a", "b"]))
+    assert not XPathMatch.from_path_string("/a/b").may_match_descendant(XPath(["a", "b"]))
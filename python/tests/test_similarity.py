@@ -0,0 +1,71 @@
+import os
+import subprocess
+import random
+import sys
+
+import diff_json.similarity as similarity
+from diff_json.similarity import (MIN_BAND_RECALL, SKETCH_SIZE, band_recall, find_similar_pairs, get_band_rows,
+                                  leaf_tokens, minhash_sketch, sketch_similarity)
+
+def test_leaf_tokens_distinguish_paths_and_types():
+    assert len(set(leaf_tokens({"a": 1, "b": 1}))) == 2
+    assert set(leaf_tokens({"a": 1})) != set(leaf_tokens({"a": True}))
+    assert set(leaf_tokens({"a": []})) != set(leaf_tokens({"a": {}}))
+
+def test_minhash_sketch_empty_value():
+    assert len(minhash_sketch({})) == SKETCH_SIZE
+    assert minhash_sketch({}) != minhash_sketch([])
+
+def test_sketch_similarity():
+    record = {str(i): i for i in range(50)}
+    modified = dict(record, **{"0": "changed"})
+    assert sketch_similarity(minhash_sketch(record), minhash_sketch(record)) == 1
+    assert sketch_similarity(minhash_sketch(record), minhash_sketch(modified)) > 0.8
+    assert sketch_similarity(minhash_sketch(record), minhash_sketch({"other": 1})) < 0.2
+
+def test_find_similar_pairs():
+    records = [{"id": i, "name": f"record {i}", "values": list(range(i, i + 10))} for i in range(3)]
+    old_sketches = {i: minhash_sketch(records[i]) for i in range(3)}
+    new_sketches = {
+        "first": minhash_sketch(dict(records[2], name="renamed")),
+        "second": minhash_sketch(records[0]),
+        "third": minhash_sketch({"unrelated": True})
+    }
+    pairs = find_similar_pairs(old_sketches, new_sketches, 0.5)
+    assert [(old_key, new_key) for _, old_key, new_key in pairs] == [(0, "second"), (2, "first")]
+
+def test_minhash_sketch_independent_of_hash_seed():
+    code = "from diff_json.similarity import minhash_sketch; print(minhash_sketch({'a': ['x', 1.5], 'b': {'c': None}}))"
+    sketches = set()
+
+    for hash_seed in ("1", "2", "3"):
+        environment = dict(os.environ, PYTHONHASHSEED=hash_seed)
+        result = subprocess.run([sys.executable, "-c", code], env=environment, capture_output=True, text=True,
+                                check=True)
+        sketches.add(result.stdout)
+
+    assert len(sketches) == 1
+    assert sketches == {f"{minhash_sketch({'a': ['x', 1.5], 'b': {'c': None}})}\n"}
+
+def test_get_band_rows_recall():
+    assert get_band_rows(0.5) == 2
+    assert get_band_rows(0.75) == 4
+    assert get_band_rows(0.1) == 1
+
+    for threshold in (0.2, 0.5, 0.6, 0.75, 0.9, 0.99):
+        assert band_recall(threshold, get_band_rows(threshold)) >= MIN_BAND_RECALL
+
+def test_find_similar_pairs_candidates_grow_linearly(monkeypatch):
+    compared = []
+    monkeypatch.setattr(similarity, "sketch_similarity",
+                        lambda sketch1, sketch2: compared.append(1) or sketch_similarity(sketch1, sketch2))
+    records = [{"id": i, "type": "user", "active": True, "region": "eu", "name": f"n{i}", "score": i * 3}
+               for i in range(400)]
+    modified = [dict(record, score=record["score"] + 1) for record in records]
+    random.Random(0).shuffle(modified)
+    old_sketches = {i: minhash_sketch(records[i]) for i in range(len(records))}
+    new_sketches = {i: minhash_sketch(modified[i]) for i in range(len(modified))}
+    pairs = find_similar_pairs(old_sketches, new_sketches, 0.5)
+    assert len(compared) < 20 * len(records)
+    assert all(records[old_key]["id"] == modified[new_key]["id"] for _, old_key, new_key in pairs)
+    assert len(pairs) > 0.95 * len(records)
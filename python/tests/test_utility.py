@@ -1,4 +1,7 @@
-from diff_json.utility import py_to_json_type, sets_are_distinct
+import pytest
+
+import diff_json.utility as utility
+from diff_json.utility import decode_json, is_encoded_json, is_lossy_float, py_to_json_type, sets_are_distinct
 
 def test_py_to_json_type_none_for_set():
     assert py_to_json_type(set()) == None
@@ -15,3 +18,39 @@ def test_sets_are_distinct_not_unique():
     set1 = {"one"}
     set2 = {"one"}
     assert not sets_are_distinct(set1, set2)
+
+def test_is_encoded_json():
+    assert is_encoded_json('{}')
+    assert is_encoded_json(b'{}')
+    assert is_encoded_json(bytearray(b'{}'))
+    assert is_encoded_json(memoryview(b'{}'))
+    assert not is_encoded_json({})
+
+def test_decode_json_bytes_like():
+    assert decode_json(b'{"a": [1]}') == {"a": [1]}
+    assert decode_json(bytearray(b'{"a": [1]}')) == {"a": [1]}
+    assert decode_json(memoryview(b'{"a": [1]}')) == {"a": [1]}
+
+def test_decode_json_without_orjson(monkeypatch):
+    monkeypatch.setattr(utility, "orjson", None)
+    assert decode_json(memoryview(b'{"a": [1]}')) == {"a": [1]}
+
+def test_decode_json_non_finite_numbers():
+    assert decode_json('[Infinity]') == [float("inf")]
+
+def test_decode_json_invalid():
+    with pytest.raises(ValueError):
+        decode_json(b'{')
+
+def test_is_lossy_float():
+    assert is_lossy_float(float(18446744073709551616))
+    assert is_lossy_float(-9.3e18)
+    assert not is_lossy_float(9.2e18)
+    assert not is_lossy_float(0.5)
+    assert not is_lossy_float(18446744073709551617)
+    assert not is_lossy_float(float("inf"))
+    assert not is_lossy_float(float("nan"))
+
+def test_decode_json_exact():
+    assert decode_json(b'{"id": 18446744073709551617}', exact=True) == {"id": 18446744073709551617}
+    assert decode_json(memoryview(b'[-9223372036854775809]'), exact=True) == [-9223372036854775809]